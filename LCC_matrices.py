@@ -2,127 +2,271 @@
 
 import os
 from pathlib import Path
+import numpy as np
 import pandas as pd 
-import geopandas as gpd 
+import pyogrio
 import openpyxl
 from openpyxl.styles import (
     PatternFill,
     Border, 
     Side, 
     Font,
+    Alignment,
 )
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 
+# cell styles shared by all sheets
+_THIN = Side(border_style="thin", color="000000")
+_BORDER_THIN = Border(top=_THIN, left=_THIN, right=_THIN, bottom=_THIN)
+_BOLD = Font(bold=True)
+_HEADER_ALIGN = Alignment(horizontal='center', vertical='top')
 
-def addStyle(path:str, sheets:list, classes:list, colors:dict=None, sheet_type:str='matrix'):
+# one decimal point, show commas, negative numbers are parenthesis, 0 is a dash
+_NUM_FMT_MATRIX = '_(* #,##0.0_);_(* (#,##0.0);_(* "-"??_);_(@_)' # display as whole number without rounding true values
+
+# represents a percentage, negative numbers are parenthesis, 0 is a dash
+_NUM_FMT_DIFF = '_(* 0.00%_);_(* (0.00%);_(* "-"??_);_(@_)'
+
+# solid fills by hex color
+_FILL_CACHE = {}
+
+# square meters to acres
+_ACRES_PER_SQ_METER = 1.0 / 4046.86
+
+def _solid_fill(hex_color:str) -> PatternFill:
     """
-    addStyle This method identifies cells in the matrices that are unlikely and need verification (yellow) and incorrect
-             transitions (red) and color codes them.
+    _solid_fill Solid fill for a hex color, built once per color. 6 character RGB codes are given an opaque alpha,
+                otherwise openpyxl reads them as fully transparent ARGB codes.
 
     Parameters
     ----------
-    path : str
-        path to excel workbook containing LCC matrices.
-    sheets : list
-        list of excel sheet names.
-    classes : list
-        list of unique LC classes
-    colors : dict, optional, default is None
-        dictionary of LC transitions and the color to assign.
-    sheet_type : str, optional, default is matrix
-        Sheet type. Options: matrix, difference, totals
-    """     
-
-    # excel
-    worksheet = openpyxl.load_workbook(path)
-    for i in range(len(sheets)):
-        cur_sheet = worksheet[sheets[i]]
-
-        if sheet_type =='matrix':
-            for color in colors:
-                # pattern to fill 
-                fmtFillPattern = PatternFill(start_color=colors[color]['hex'],fill_type='solid')
+    hex_color : str
+        RGB (i.e. FF1300) or ARGB (i.e. FFFF1300) hex color code.
+
+    Returns
+    -------
+    PatternFill
+        solid fill of the color.
+    """
+    if hex_color not in _FILL_CACHE:
+        argb = f"FF{hex_color}" if len(hex_color) == 6 else hex_color
+        if len(argb) != 8:
+            raise Exception(f"Expected a 6 (RGB) or 8 (ARGB) character hex color. Got {hex_color}")
 
-                # iterate transitions
-                xy = []
+        _FILL_CACHE[hex_color] = PatternFill(start_color=argb, end_color=argb, fill_type='solid')
+    return _FILL_CACHE[hex_color]
+
+class QAWorkbookBuilder:
+    """
+    QAWorkbookBuilder Holds the county QA workbook in memory while the matrix, difference, and totals sheets are
+                      written and styled, so the workbook is only saved to disk once. The workbook is write-only,
+                      cells are styled as they are created and streamed to the sheet. Use as a context manager
+                      so the sheets' temporary files are removed if the workbook is never saved.
+    """
+
+    def __init__(self):
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_sheet(self, sheet:str, df:pd.DataFrame, classes:list, colors:dict=None, sheet_type:str='matrix'):
+        """
+        _write_sheet Write a DataFrame, including its index, to a new sheet. Transitions in the matrices that are 
+                     unlikely and need verification (yellow) and incorrect transitions (red) are color coded.
+
+        Parameters
+        ----------
+        sheet : str
+            excel sheet name.
+        df : pd.DataFrame
+            data to write.
+        classes : list
+            list of unique LC classes
+        colors : dict, optional, default is None
+            dictionary of LC transitions and the color to assign.
+        sheet_type : str, optional, default is matrix
+            Sheet type. Options: matrix, difference, totals
+        """
+        cur_sheet = self.workbook.create_sheet(sheet)
+
+        # number format
+        num_fmt = _NUM_FMT_MATRIX
+        if sheet_type == 'difference':
+            num_fmt = _NUM_FMT_DIFF
+
+        # fill of the transition cells (row, column)
+        fills = {}
+        if sheet_type == 'matrix' and colors is not None:
+            for color in colors:
                 for t in colors[color]['transitions']:
-                    x, y = classes.index(t[0])+2, classes.index(t[1])+2
-                    xy.append((x,y))
-
-                # Apply fill
-                for row in cur_sheet.iter_rows(cur_sheet.min_row,cur_sheet.max_row):
-                    for cell in row:
-                        if (cell.row, cell.col_idx) in xy:
-                            if cell.value > 0:
-                                cell.fill = fmtFillPattern
-        
-        # TODO add style to totals and differenced matrix
-
-        # apply whole number format and borders around all cells
-        thin = Side(border_style="thin", color="000000")
-        for row in cur_sheet.iter_rows(cur_sheet.min_row,cur_sheet.max_row):
-            for cell in row:  
-                cell.border = Border(top=thin, left=thin, right=thin, bottom=thin)  
-                if cell.column > 1: # skip left index
-
-                    if sheet_type == 'difference': # represents a percentage, negative numbers are parenthesis, 0 is a dash
-                        cell.number_format = '_(* 0.00%_);_(* (0.00%);_(* "-"??_);_(@_)'
-                    else:
-                        # one decimal point, show commas, negative numbers are parenthesis, 0 is a dash
-                        cell.number_format = '_(* #,##0.0_);_(* (#,##0.0);_(* "-"??_);_(@_)' # display as whole number without rounding true values
-                    
-                    # bold totals columns
-                    if cur_sheet.cell(cell.row, 1).value in ['Decrease', 'Increase', 'Net Change']:
-                        cell.font = Font(bold=True)
-                else:
-                    cell.font = Font(bold=True)
-
-        # adjust column size
+                    fills[(classes.index(t[0])+2, classes.index(t[1])+2)] = _solid_fill(colors[color]['hex'])
+
+        # adjust column size, must be set before any rows are written
+        header = [df.index.name, *df.columns]
         max_length = 12
         if sheet_type == 'totals':
             max_length = 18
-        for col in cur_sheet.columns:
-            column = col[0].column_letter # Get the column name
-            if sheet_type == 'totals' and col[0].value == 'LandCover':
+        for c, name in enumerate(header, 1):
+            column = get_column_letter(c)
+            if sheet_type == 'totals' and name == 'LandCover':
                 cur_sheet.column_dimensions[column].width = 35
             else:
                 cur_sheet.column_dimensions[column].width = max_length
 
-    # save formatting
-    worksheet.save(path)
-    worksheet.close()
+        # header
+        cells = []
+        for name in header:
+            cell = WriteOnlyCell(cur_sheet, value=name)
+            cell.border = _BORDER_THIN
+            cell.font = _BOLD
+            cell.alignment = _HEADER_ALIGN
+            cells.append(cell)
+        cur_sheet.append(cells)
+
+        # rows, missing values are left blank
+        values = df.astype(object).where(df.notna(), None)
+        for r, (idx, row) in enumerate(zip(values.index, values.itertuples(index=False, name=None)), 2):
+            # left index
+            cell = WriteOnlyCell(cur_sheet, value=idx)
+            cell.border = _BORDER_THIN
+            cell.font = _BOLD
+            cell.alignment = _HEADER_ALIGN
+            cells = [cell]
+
+            # apply whole number format and borders around all cells, bold totals columns
+            bold = idx in ('Decrease', 'Increase', 'Net Change')
+            for c, value in enumerate(row, 2):
+                cell = WriteOnlyCell(cur_sheet, value=value)
+                cell.border = _BORDER_THIN
+                cell.number_format = num_fmt
+                if bold:
+                    cell.font = _BOLD
+                if (r, c) in fills and value is not None and value > 0:
+                    cell.fill = fills[(r, c)]
+                cells.append(cell)
+            cur_sheet.append(cells)
+
+    def add_matrix_sheet(self, sheet:str, df:pd.DataFrame, classes:list, colors:dict):
+        """
+        add_matrix_sheet Write a change matrix and highlight the transitions that need double checking.
+
+        Parameters
+        ----------
+        sheet : str
+            excel sheet name.
+        df : pd.DataFrame
+            change matrix.
+        classes : list
+            list of unique LC classes
+        colors : dict
+            dictionary of LC transitions and the color to assign.
+        """
+        self._write_sheet(sheet, df, classes, colors)
+
+    def add_diff_sheet(self, sheet:str, df:pd.DataFrame, classes:list):
+        """
+        add_diff_sheet Write a differenced change matrix.
+
+        Parameters
+        ----------
+        sheet : str
+            excel sheet name.
+        df : pd.DataFrame
+            differenced change matrix.
+        classes : list
+            list of unique LC classes
+        """
+        self._write_sheet(sheet, df, classes, sheet_type='difference')
+
+    def add_totals_sheet(self, sheet:str, df:pd.DataFrame):
+        """
+        add_totals_sheet Write the static LC totals.
+
+        Parameters
+        ----------
+        sheet : str
+            excel sheet name.
+        df : pd.DataFrame
+            acres of total static land cover by class.
+        """
+        self._write_sheet(sheet, df, classes=[], sheet_type='totals')
+
+    def save(self, path:str):
+        """
+        save Write the workbook to disk.
+
+        Parameters
+        ----------
+        path : str
+            path to write all QA results for the county (XLSX file).
+        """
+        self.workbook.save(path)
+        self.workbook.close()
+        self._closed = True
+
+    def close(self):
+        """
+        close Discard the workbook without saving, removing the temporary files the sheets are streamed to.
+              Does nothing once the workbook is saved or closed.
+        """
+        if self._closed:
+            return
+
+        for ws in self.workbook.worksheets:
+            if not ws.closed:
+                ws.close()
+            # openpyxl only removes the temporary file on save, or at exit (which pool workers skip)
+            if os.path.exists(ws._writer.out):
+                ws._writer.cleanup()
+        self.workbook.close()
+        self._closed = True
 
 def createMatrices(
                 data_folder:str,
-                qaqc_path:str,
+                builder:QAWorkbookBuilder,
                 cf:str,
                 years:list,
                 version:str,
-                lcc_lookup:pd.DataFrame,
+                early_map:dict,
+                late_map:dict,
                 colors:dict,
-                lc_abbrev:dict=None) -> pd.DataFrame:
+                lc_abbrev:dict=None) -> tuple:
     """
     createMatrices This method locates the LCC raster attribute tables, converts them to change matrices, and
-                   calls the addStyle method to color-code unlikely transitions. The values are in acres and 
+                   writes them to the QA workbook with unlikely transitions color-coded. The values are in acres and 
                    are not rounded to allow for identification of very small (including single-pixel) transitions.
 
     Parameters
     ----------
     data_folder : str
         path to folder containing cf folders.
-    qaqc_path : str
-        path to write all QA results for the county.
+    builder : QAWorkbookBuilder
+        in-memory QA workbook for the county.
     cfs : str
         county_fips AKA cofips AKA cfs.
     years : list
         list of years mapped for county.
     version : str
         data version (2022ed or 2024ed).
-    lcc_lookup : pd.DataFrame
-        dataframe relating lcc values and the lc change names.
+    early_map : dict
+        early date lc name by lcc value.
+    late_map : dict
+        late date lc name by lcc value (missing for no change).
     colors : dict
         dictionary of LC transitions and the color to assign
     lc_abbrev : dict, Optional, default None
         dictionary to abbreviate LC class names in matrices.
+
+    Returns
+    -------
+    tuple
+        dictionary of change matrices keyed by sheet name, and the acres of total static land cover by class.
     """
     # locate LC change paths
     input_folder = f"{data_folder}/{cf}/input"
@@ -130,8 +274,14 @@ def createMatrices(
     # dataframe of LC totals
     totals = []
 
+    # all LC names in the lookup
+    lc_classes = [
+        c for c in dict.fromkeys([*early_map.values(), *late_map.values()]) 
+        if isinstance(c, str)
+    ]
+
     # read in change raster RATs and convert to change matrix
-    matrices = []
+    matrices = {}
     for i in range(len(years)-1):
         # read in RAT
         p = f"{input_folder}/{cf}_landcoverchange_{years[i]}_{years[i+1]}.tif.vat.dbf"
@@ -140,27 +290,20 @@ def createMatrices(
         if not os.path.isfile(p):
             raise Exception(f"{Path(p).name} does not exist.")
 
+        # RAT is a plain dBase table, skip the geometry
         df = (
-            gpd.read_file(p)
-            .filter(items=['Value', 'Count'])
+            pyogrio.read_dataframe(p, columns=['Value', 'Count'], read_geometry=False)
             .set_index('Value')
         )
 
-        # add LC names
-        df = (
-            df
-            .merge(lcc_lookup, 
-                   left_on='Value', 
-                   right_index=True, 
-                   how='left')
-            .rename(columns = {
-                'early' : str(years[i]),
-                'late'  : str(years[i+1]),
-            })
-        )
+        # add LC names, categorical so renaming and ordering classes only touches the categories
+        df = df.assign(**{
+            str(years[i])   : pd.Categorical(df.index.map(early_map), categories=lc_classes),
+            str(years[i+1]) : pd.Categorical(df.index.map(late_map), categories=lc_classes),
+        })
         
         # convert count (square meters) to acres
-        df.loc[:, "Acres"] = df['Count'] / 4046.86
+        df = df.assign(Acres=df['Count'].to_numpy() * _ACRES_PER_SQ_METER)
 
         # calculate totals
         totals.append(
@@ -169,79 +312,73 @@ def createMatrices(
 
         # if abbrevation dictionary - replace names with abbreviations
         if lc_abbrev is not None:
-            df = (
-                df
-                .replace({str(years[i]):lc_abbrev})
-                .replace({str(years[i+1]):lc_abbrev})
-            )
+            df = df.assign(**{
+                str(years[i])   : df[str(years[i])].cat.rename_categories(lc_abbrev),
+                str(years[i+1]) : df[str(years[i+1])].cat.rename_categories(lc_abbrev),
+            })
             classes = list(lc_abbrev.values())
         else:
             # list of all unique classes
-            classes = lcc_lookup['early'].unique().tolist()
+            classes = list(dict.fromkeys(early_map.values()))
 
-        # drop cols
-        df = df[[f"{years[i]}", f"{years[i+1]}", "Acres"]]
+        # drop cols, categorical classes keep every class (in class order) in the matrix
+        df = (
+            df[[f"{years[i]}", f"{years[i+1]}", "Acres"]]
+            .assign(**{
+                f"{years[i]}"   : df[f"{years[i]}"].cat.set_categories(classes),
+                f"{years[i+1]}" : df[f"{years[i+1]}"].cat.set_categories(classes),
+            })
+        )
 
-        # create pivot table
+        # create change matrix
         matrix = (
-            pd.pivot_table(df, values='Acres', index=f"{years[i]}", columns=f"{years[i+1]}")
+            df
+            .groupby([f"{years[i]}", f"{years[i+1]}"], observed=False)['Acres']
+            .sum()
+            .unstack(fill_value=0.0)
             .round(4)
         )
 
-        # validate all classes are present
-        for c in classes:
-            if c not in matrix.columns:
-                matrix.loc[:, c] = 0
-            if c not in matrix.index:
-                matrix.loc[c, :] = 0
-
-            # ensure no change is 0
-            matrix.loc[c, c] = 0
-        
-        # change class order
-        matrix = matrix.reindex(classes)
-        matrix = matrix[classes]
-        matrix = matrix.fillna(0)
-
-        # totals
-        matrix.loc[:, 'Decrease'] = matrix[classes].sum(axis=1)
-        matrix.loc['Increase'] = matrix[classes].sum(axis=0)
-        matrix.loc['Decrease'] = matrix['Decrease'].tolist()
-        matrix.loc['Net Change'] = matrix.loc['Increase'] - matrix.loc['Decrease']
-        matrix.loc['Increase', 'Decrease'] = sum(matrix['Decrease'][0:len(classes)])
+        # ensure no change is 0
+        values = matrix.to_numpy(copy=True)
+        np.fill_diagonal(values, 0.0)
+
+        # totals, total change is the Increase/Decrease cell
+        n = len(classes)
+        decrease = values.sum(axis=1)
+        increase = values.sum(axis=0)
+        matrix_values = np.full((n+3, n+1), np.nan)
+        matrix_values[:n, :n] = values
+        matrix_values[:n, n] = decrease
+        matrix_values[n, :n] = increase
+        matrix_values[n, n] = decrease.sum()
+        matrix_values[n+1, :n] = decrease
+        matrix_values[n+2, :n] = increase - decrease
+
+        matrix = pd.DataFrame(
+            matrix_values,
+            index=pd.Index(classes + ['Increase', 'Decrease', 'Net Change'], name=f"{years[i]}"),
+            columns=pd.Index(classes + ['Decrease'], name=f"{years[i+1]}"),
+        )
 
         # store results
-        matrices.append(matrix.copy())
-
-    if len(matrices) > 0:
-        # write matrices
-        sheets = []
-        mode = 'a'
-        if not os.path.isfile(qaqc_path):
-            mode = 'w'
-        with pd.ExcelWriter(qaqc_path, mode=mode) as writer:
-            for i in range(len(matrices)):
-                sheet = f"{years[i]}-{years[i+1]}-{version}" 
-                matrices[i].to_excel(writer, sheet_name=sheet, index=True)
-                sheets.append(sheet)
-
-        # highlight cells that need double checking
-        addStyle(qaqc_path, sheets, classes, colors)
-
-    # merge all totals dfs
+        matrices[f"{years[i]}-{years[i+1]}-{version}"] = matrix
+
+    # write matrices and highlight cells that need double checking
+    for sheet in matrices:
+        builder.add_matrix_sheet(sheet, matrices[sheet], classes, colors)
+
+    # merge all totals dfs, classes missing from a change period are 0
     total_df = None
-    for tot_df in totals:
-        if total_df is None:
-            total_df = tot_df.copy()
-        else:
-            total_df = (
-                total_df
-                .merge(tot_df, on='LandCover', how='outer')
-                .fillna(0.0)
-            )
+    if len(totals) > 0:
+        total_df = (
+            pd.concat(totals, axis=0, ignore_index=True)
+            .groupby('LandCover', as_index=False)
+            .sum()
+        )
 
-    # return totals
-    return total_df
+    # return matrices and totals
+    return matrices, total_df
 
 def totals_helper(lcc_df:pd.DataFrame, early:str, late:str, version:str) -> pd.DataFrame:
     """
@@ -266,60 +403,51 @@ def totals_helper(lcc_df:pd.DataFrame, early:str, late:str, version:str) -> pd.D
         Acres of total static land cover by class for the early and late dates represented in the LC change raster.
     """
 
-    # make local copy
-    df = lcc_df.copy()
+    # make local copy of the columns needed
+    df = lcc_df[[early, late, 'Acres']].copy()
 
     # copy no change values to late date
     df.loc[df[late].isna(), late] = df[early]
 
-    # calculate totals from the early date
-    early_tot = (
-        df
-        .filter(items=[early,'Acres'])
-        .groupby([early])
-        .sum()
-        .reset_index()
-        .rename(columns={
-            'Acres' : f"{early}_{early[2:]}{late[2:]}_{version}",
-            early : "LandCover"
-        })
-    )
-
-    # calculate totals for the late date
-    late_tot = (
-        df
-        .filter(items=[late,'Acres'])
-        .groupby([late])
+    # stack the early and late LC into a single column, tagged by the totals column name
+    stacked = pd.concat([
+        df[[early, 'Acres']]
+        .rename(columns={early : "LandCover"})
+        .assign(period=f"{early}_{early[2:]}{late[2:]}_{version}"),
+        df[[late, 'Acres']]
+        .rename(columns={late : "LandCover"})
+        .assign(period=f"{late}_{early[2:]}{late[2:]}_{version}"),
+    ], ignore_index=True)
+
+    # calculate totals for the early and late dates
+    totals = (
+        stacked
+        .groupby(['LandCover', 'period'], sort=False, observed=True)['Acres']
         .sum()
+        .unstack('period', fill_value=0.0)
+        .rename_axis(columns=None)
         .reset_index()
-        .rename(columns={
-            'Acres' : f"{late}_{early[2:]}{late[2:]}_{version}",
-            late : "LandCover"
-        })
-    )
-
-    # merge data
-    totals = (
-        early_tot
-        .merge(late_tot, on='LandCover', how='outer')
-        .fillna(0.0)
+        .astype({'LandCover' : str})
     )
 
     # return data
     return totals
 
-def write_static_totals(df22:pd.DataFrame, df24:pd.DataFrame, qaqc_path:str):
+def write_static_totals(df22:pd.DataFrame, df24:pd.DataFrame, builder:QAWorkbookBuilder):
     """
-    write_static_totals _summary_
+    write_static_totals 
+    
+    Merge the total Land Cover, in acres, of both versions of data and add it to the QA workbook as the LC_Totals
+    sheet, styled as it is written.
 
     Parameters
     ----------
     df22 : pd.DataFrame
-        _description_
+        Acres of total static land cover by class from the 2022 edition change periods.
     df24 : pd.DataFrame
-        _description_
-    qaqc_path : str
-        _description_
+        Acres of total static land cover by class from the 2024 edition change periods.
+    builder : QAWorkbookBuilder
+        in-memory QA workbook for the county.
     """
     # merge LC totals
     all_totals = (
@@ -338,24 +466,16 @@ def write_static_totals(df22:pd.DataFrame, df24:pd.DataFrame, qaqc_path:str):
     all_totals.loc['Total Acres'] = all_totals.sum(axis=0)
 
     # organize columns
-    columns = list(all_totals)
-    columns.sort()
-    all_totals = all_totals[columns]
+    all_totals = all_totals.sort_index(axis=1)
 
     # write totals
-    with pd.ExcelWriter(qaqc_path, mode='a') as writer:
-        sheet = f"LC_Totals" 
-        all_totals.to_excel(writer, sheet_name=sheet, index=True)
-
-    # add style
-    addStyle(qaqc_path, 
-             sheets=[sheet], 
-             classes=[], 
-             sheet_type='totals')
+    builder.add_totals_sheet(f"LC_Totals", all_totals)
 
 
 def difference_matrices(
-                qaqc_path:str,
+                builder:QAWorkbookBuilder,
+                df1:pd.DataFrame,
+                df2:pd.DataFrame,
                 year1:int,
                 year2:int,
                 versions:list):
@@ -365,8 +485,12 @@ def difference_matrices(
 
     Parameters
     ----------
-    qaqc_path : str
-        Path to write results (XLSX file)
+    builder : QAWorkbookBuilder
+        in-memory QA workbook for the county.
+    df1 : pd.DataFrame
+        Change matrix of the first version (i.e. versions[0]).
+    df2 : pd.DataFrame
+        Change matrix of the second version (i.e. versions[1]).
     year1 : int
         Start year of the change period.
     year2 : int
@@ -377,18 +501,6 @@ def difference_matrices(
     if len(versions) != 2:
         raise Exception(f"Expected 2 versions to compare. Got {versions}")
 
-    # read in first matrix
-    df1 = (
-        pd.read_excel(qaqc_path, sheet_name=f"{year1}-{year2}-{versions[0]}")
-        .set_index(str(year1))
-    )
-
-    # read in second matrix
-    df2 = (
-        pd.read_excel(qaqc_path, sheet_name=f"{year1}-{year2}-{versions[1]}")
-        .set_index(str(year1))
-    )
-
     # store total change in most recent version
     tot_change = df1.loc['Increase', 'Decrease']
 
@@ -399,12 +511,7 @@ def difference_matrices(
     df1 = df1 / tot_change
 
     # write results
-    sheet = f"{year1}-{year2}_{versions[0]}-{versions[1]}" 
-    with pd.ExcelWriter(qaqc_path, mode='a') as writer:
-        df1.to_excel(writer, sheet_name=sheet, index=True)
-
-    # add style
-    addStyle(qaqc_path, 
-             sheets=[sheet], 
-             classes=list(df1.columns[0:-1]), 
-             sheet_type='difference')
\ No newline at end of file
+    builder.add_diff_sheet(
+        f"{year1}-{year2}_{versions[0]}-{versions[1]}", 
+        df1, 
+        classes=list(df1.columns[0:-1]))
\ No newline at end of file
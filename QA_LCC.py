@@ -1,18 +1,23 @@
 import os
 from pathlib import Path
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import multiprocessing
 import toml
 import pandas as pd
 
 # Set up logging
 import logging
-import logging.config
 from logging_config import (
     get_log_config,
+    init_worker_logging,
     log_uncaught_exception,
+    start_logging,
 )
 
 from LCC_matrices import (
+    QAWorkbookBuilder,
     createMatrices,
     difference_matrices,
     write_static_totals
@@ -21,8 +26,83 @@ from LCC_matrices import (
 # Capture warnings to logging
 logging.captureWarnings(True)
 
-# Create logger
-logger = logging.getLogger(__name__)
+# Create logger, spawned workers import this script as __mp_main__
+logger = logging.getLogger('__main__' if __name__ == '__mp_main__' else __name__)
+
+def process_county(cf:str, config:dict, colors:dict, lc_dates:pd.DataFrame, early_map:dict, late_map:dict):
+    """
+    process_county Create, difference, and total the LCC matrices for a county and write its QA workbook.
+
+    Parameters
+    ----------
+    cf : str
+        county_fips AKA cofips AKA cfs.
+    config : dict
+        run configuration (config.toml).
+    colors : dict
+        dictionary of LC transitions (abbreviated) and the color to assign.
+    lc_dates : pd.DataFrame
+        T1, T2, and T3 mapped years by cofips.
+    early_map : dict
+        early date lc name by lcc value.
+    late_map : dict
+        late date lc name by lcc value (missing for no change).
+    """
+    logger.info(f"Starting {cf}")
+
+    # get mapped years for county
+    years = lc_dates.loc[cf, ['T1','T2','T3']].tolist()
+    output_path = f"{config['folders']['qaqc']}/{cf}_LCC_QA.xlsx"
+
+    # the workbook's temporary files are removed even if the county fails
+    with QAWorkbookBuilder() as builder:
+        # create matrices for new data
+        logger.info(f"{cf} Creating matrices for 2024 edition")
+        matrices24, total_df24 = createMatrices(
+                data_folder=config['folders']['landuse_24ed'],
+                builder=builder,
+                cf=cf,
+                years=years,
+                version='2024ed',
+                early_map=early_map,
+                late_map=late_map,
+                colors=colors,
+                lc_abbrev=config['LC_abbrev'])
+    
+        # create matrix for old data
+        logger.info(f"{cf} Creating matrices for 2022 edition")
+        matrices22, total_df22 = createMatrices(
+                data_folder=config['folders']['landuse_22ed'],
+                builder=builder,
+                cf=cf,
+                years=years[0:2],
+                version='2022ed',
+                early_map=early_map,
+                late_map=late_map,
+                colors=colors,
+                lc_abbrev=config['LC_abbrev'])
+    
+        # difference T1-T2 matrices between versions
+        logger.info(f"{cf} Differecing matrices for T1-T2")
+        difference_matrices(
+                builder=builder,
+                df1=matrices24[f"{years[0]}-{years[1]}-2024ed"],
+                df2=matrices22[f"{years[0]}-{years[1]}-2022ed"],
+                year1=years[0],
+                year2=years[1],
+                versions=['2024ed', '2022ed'])
+    
+        # write total LC acres per class from each dataset and version
+        logger.info(f"{cf} Write LC totals")       
+        write_static_totals(
+            df24=total_df24,
+            df22=total_df22,
+            builder=builder
+        )
+
+        # write workbook
+        logger.info(f"{cf} Saving {output_path}")
+        builder.save(output_path)
 
 if __name__=="__main__":
 
@@ -52,6 +132,13 @@ if __name__=="__main__":
         help="Name of column in cofips-lookup containing cofips to QA. Requires --cofips-lookup to be passed."
     )
 
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=None,
+        help="Number of counties to process in parallel. Defaults to the number of CPUs (or the number of counties, if fewer)."
+    )
+
     # parse arguments
     args = parser.parse_args()
 
@@ -59,6 +146,7 @@ if __name__=="__main__":
     cfs = args.cfs
     cofips_lookup = args.cofips_lookup
     column_name = args.column_name
+    max_workers = args.max_workers
 
     # determine unique list of cofips
     if cofips_lookup and column_name:   
@@ -82,11 +170,13 @@ if __name__=="__main__":
     )
     config = toml.load(f"{code_dir}/config.toml")
 
-    # Set up logging configuration based on CLI args
+    # Set up logging configuration based on CLI args, the county workers log to the same
+    # file, so every process appends each record whole as it is logged
     LOG_CONFIG = get_log_config(
         log_file_path=config['folders']['logging'],
-        log_file_name=config['logging']['name'])
-    logging.config.dictConfig(LOG_CONFIG)
+        log_file_name=config['logging']['name'],
+        atomic_file=True)
+    start_logging(LOG_CONFIG)
 
     logger.info(f"--------------------Starting Run-----------------------")
     logger.info(f"Cofips to QA: {cfs}")
@@ -107,63 +197,37 @@ if __name__=="__main__":
     lcc_lookup[['early','late']] = lcc_lookup['class'].str.split(' to ', n=1, expand=True)
     lcc_lookup.drop('class', axis=1, inplace=True)
 
-    # iterate cofips
-    for cf in cfs:
-        logger.info(f"Starting {cf}")
-
-        # get mapped years for county
-        years = lc_dates.loc[cf, ['T1','T2','T3']].tolist()
-        output_path = f"{config['folders']['qaqc']}/{cf}_LCC_QA.xlsx"
-
-        # replace transitions with abbreviations
-        if config['colors'] is not None:
-            for col in config['colors']:
-                trans = config['colors'][col]['transitions']
-                new_trans = []
-                for tr in trans:
-                    t = []
-                    for lc in tr:
-                        t.append(config['LC_abbrev'][lc])
-                    new_trans.append(t.copy())
-                
-                config['colors'][col]['transitions'] = new_trans.copy()
-
-        # create matrices for new data
-        logger.info(f"{cf} Creating matrices for 2024 edition")
-        total_df24 = createMatrices(
-                data_folder=config['folders']['landuse_24ed'],
-                qaqc_path=output_path,
-                cf=cf,
-                years=years,
-                version='2024ed',
-                lcc_lookup=lcc_lookup,
-                colors=config['colors'],
-                lc_abbrev=config['LC_abbrev'])
-        
-        # create matrix for old data
-        logger.info(f"{cf} Creating matrices for 2022 edition")
-        total_df22 = createMatrices(
-                data_folder=config['folders']['landuse_22ed'],
-                qaqc_path=output_path,
-                cf=cf,
-                years=years[0:2],
-                version='2022ed',
-                lcc_lookup=lcc_lookup,
-                colors=config['colors'],
-                lc_abbrev=config['LC_abbrev'])
-        
-        # difference T1-T2 matrices between versions
-        logger.info(f"{cf} Differecing matrices for T1-T2")
-        difference_matrices(
-                qaqc_path=output_path,
-                year1=years[0],
-                year2=years[1],
-                versions=['2024ed', '2022ed'])
-        
-        # write total LC acres per class from each dataset and version
-        logger.info(f"{cf} Write LC totals")       
-        write_static_totals(
-            df24=total_df24,
-            df22=total_df22,
-            qaqc_path=output_path
-        )
+    # early and late lc by lcc value
+    early_map = lcc_lookup['early'].to_dict()
+    late_map = lcc_lookup['late'].to_dict()
+
+    # replace transitions with abbreviations
+    colors = None
+    if config['colors'] is not None:
+        colors = {
+            col : {
+                'hex' : spec['hex'],
+                'transitions' : [[config['LC_abbrev'][lc] for lc in tr] for tr in spec['transitions']],
+            }
+            for col, spec in config['colors'].items()
+        }
+
+    # iterate cofips, counties are independent so they are processed in parallel
+    if max_workers is None:
+        max_workers = min(len(cfs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            # spawn rather than fork the threaded (logging) parent, as on Windows and macOS
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker_logging,
+            initargs=(LOG_CONFIG,)) as executor:
+        list(executor.map(
+            partial(
+                process_county,
+                config=config,
+                colors=colors,
+                lc_dates=lc_dates,
+                early_map=early_map,
+                late_map=late_map),
+            cfs,
+            chunksize=1))
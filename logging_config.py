@@ -1,89 +1,428 @@
+"""Logging configuration for the LCC QAQC scripts.
+
+The log format only uses the time, level, logger name, line number, git hash and
+message, so logging's per-record lookups of the thread, process and asyncio task are
+turned off at import. The line number still requires `logging` to walk the stack for
+each record (`Logger.findCaller`). Setting `logging._srcfile = None` would skip that walk,
+but every line number would then be logged as 0, so it is kept.
+"""
 from pathlib import Path
+import atexit
+import copy
+import functools
 import logging
-import traceback
+import logging.config
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import sys
+import threading
+import time
 import os
-import subprocess
 
 LOG_NAME = 'progress.log'
 FILE_LOG_LEVEL = 'INFO'
 FILE_MODE = 'a'
+FILE_BUFFER_SIZE = 131072 # bytes of records held before writing to the log file
+FILE_FLUSH_INTERVAL = 30 # seconds between writes of held records
+ATOMIC_RECORD_SIZE = 4000 # max bytes of a record appended by AtomicAppendHandler, under PIPE_BUF
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+GIT_TIMEOUT = 2.0 # seconds to wait for git before logging without the hash
+
+# directory of the scripts, not resolved so no path components are stat'd
+_BASE_DIR = Path(__file__).parent
+
+# skip per-record attributes that are not in the log format
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logAsyncioTasks = False # python 3.12+
+
+# records queued by logging calls, written by the listener thread
+_log_queue = queue.Queue(-1)
+_listener = None
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """`FileHandler` that holds formatted records in memory and writes them to the file
+    together, instead of writing and flushing the file for every record.
+    Held records are written once they reach `capacity` bytes, on a record at or above
+    `flush_level`, every `flush_interval` seconds, and when the handler is closed."""
+
+    def __init__(self, filename, mode='a', encoding=None, delay=False, errors=None,
+                 capacity=FILE_BUFFER_SIZE, flush_level=logging.ERROR,
+                 flush_interval=FILE_FLUSH_INTERVAL):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=delay, errors=errors)
+        self.capacity = capacity
+        self.flush_level = logging._checkLevel(flush_level)
+        self._buffer = []
+        self._buffer_size = 0
+
+        # write held records on a timer
+        self._stop_flushing = threading.Event()
+        if flush_interval:
+            threading.Thread(
+                target=self._flush_periodically,
+                args=(flush_interval,),
+                daemon=True).start()
+
+    def _flush_periodically(self, interval):
+        while not self._stop_flushing.wait(interval):
+            self.flush()
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            self._buffer.append(msg)
+            self._buffer_size += len(msg)
+            if self._buffer_size >= self.capacity or record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                if self.stream is None and (self.mode != 'w' or not self._closed):
+                    self.stream = self._open()
+                if self.stream:
+                    self.stream.write(''.join(self._buffer))
+                    self.stream.flush()
+                self._buffer.clear()
+                self._buffer_size = 0
+        finally:
+            self.release()
+
+    def close(self):
+        self._stop_flushing.set()
+        self.flush()
+        super().close()
+
+
+class AtomicAppendHandler(logging.Handler):
+    """Handler that appends each record to the file with a single `os.write` on a file
+    opened with `O_APPEND`, so records from several processes logging to the same file
+    land whole instead of interleaving mid-line.
+    Appends up to `PIPE_BUF` (4096 bytes on Linux) are atomic, records longer than
+    `max_bytes` are truncated to stay under it. Give the formatter a smaller limit where
+    a cut record would be unreadable (i.e. `OrjsonFormatter(max_size=...)`)."""
+
+    terminator = '\n'
+
+    def __init__(self, filename, encoding='utf-8', max_bytes=ATOMIC_RECORD_SIZE):
+        super().__init__()
+        self.baseFilename = os.path.abspath(os.fspath(filename))
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self._fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def emit(self, record):
+        try:
+            data = self.format(record).encode(self.encoding)
+            if len(data) >= self.max_bytes:
+                # cut on a character boundary, keeping room for the terminator
+                data = data[:self.max_bytes - 1].decode(self.encoding, 'ignore').encode(self.encoding)
+            os.write(self._fd, data + self.terminator.encode(self.encoding))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+        super().close()
+
+
+class FastFormatter(logging.Formatter):
+    """`Formatter` that formats the record time once per second instead of once per
+    record, records logged within the same second reuse the formatted time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, datefmt, formatted time) of the last record
+        self._last_time = (None, None, None)
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        last_second, last_datefmt, s = self._last_time
+        if second != last_second or datefmt != last_datefmt:
+            s = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            self._last_time = (second, datefmt, s)
+        if not datefmt and self.default_msec_format:
+            s = self.default_msec_format % (s, record.msecs)
+        return s
+
+
+class OrjsonFormatter(logging.Formatter):
+    """`Formatter` that writes each record as a line of JSON with the record time,
+    level, logger name, line number, git hash and message, instead of filling in a
+    `%`-style template. The git hash is looked up once, when the formatter is created.
+    Uses `orjson` if it is installed, otherwise the standard `json` module.
+    With `max_size`, the message, traceback and stack are shortened (marked with
+    `TRUNCATED`) so the line is at most `max_size` bytes and still valid JSON. The end of
+    the message is dropped, and the middle of the traceback and stack."""
+
+    TRUNCATED = '...'
+
+    def __init__(self, *args, max_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.git_hash = get_git_hash()
+        self.max_size = max_size
+
+        # orjson is optional and only imported once a formatter is created,
+        # the standard json module is used instead when it is not installed
+        try:
+            import orjson
+            self._dumps = lambda entry: orjson.dumps(entry).decode()
+        except ImportError:
+            import json
+            self._dumps = functools.partial(json.dumps, ensure_ascii=False)
+
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            'lvl': record.levelname,
+            'name': record.name,
+            'line': record.lineno,
+            'git': self.git_hash,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+
+        line = self._dumps(entry)
+        if self.max_size is None:
+            return line
+
+        # shorten the longest text field by the bytes over, until the line fits
+        over = len(line.encode('utf-8')) - self.max_size
+        while over > 0:
+            key = max(('msg', 'exc', 'stack'), key=lambda k: len(entry.get(k, '')))
+            text = entry[key]
+            if len(text) <= len(self.TRUNCATED):
+                # nothing left to shorten
+                break
+            # remove characters in proportion to the bytes over, as escaped and
+            # non-ascii characters take more than one byte
+            text_size = len(self._dumps(text).encode('utf-8'))
+            cut = -(-over * len(text) // text_size)
+            keep = max(len(text) - cut - len(self.TRUNCATED), 0)
+            if key == 'msg':
+                entry[key] = text[:keep] + self.TRUNCATED
+            else:
+                # keep the start and the end of tracebacks, the last line names the exception
+                head = keep // 2
+                entry[key] = text[:head] + self.TRUNCATED + text[len(text) - (keep - head):]
+            line = self._dumps(entry)
+            over = len(line.encode('utf-8')) - self.max_size
+
+        return line
+
+
+class TracebackQueueHandler(QueueHandler):
+    """`QueueHandler` that keeps a record's traceback in `exc_text` when it puts the
+    record on the queue. `QueueHandler.prepare` appends the traceback to `msg` and clears
+    `exc_info` and `exc_text`, so the handlers behind the listener (i.e. `OrjsonFormatter`
+    and its `exc` field) could no longer tell the traceback from the message."""
+
+    def prepare(self, record):
+        # as QueueHandler.prepare, without formatting the traceback into the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            # the traceback's frames are not needed once it is formatted
+            record.exc_info = None
+        return record
+
 
 def log_uncaught_exception(*exc_info):
     """Sends uncaught exceptions to root logger.
     To implement, set `sys.excepthook` as this function:
     `sys.excepthook = log_uncaught_exception`
     """
-    
-    text = "".join(traceback.format_exception(*exc_info))
-    logging.exception(f"Unhandled exception {text}")
+    if issubclass(exc_info[0], KeyboardInterrupt):
+        # exit straight away when the user stops the run
+        sys.__excepthook__(*exc_info)
+        return
+
+    root = logging.getLogger()
+    if not root.isEnabledFor(logging.ERROR):
+        return
+
+    # the handler formats the traceback from exc_info
+    root.error("Unhandled exception", exc_info=exc_info)
 
 
+def read_git_hash(git_dir):
+    """Returns the short hash of the active git commit by reading HEAD and its ref
+    directly from the `.git` directory, without starting a git process.
+    Raises an exception if the hash cannot be found."""
+    git_dir = Path(git_dir)
+    head = (git_dir / 'HEAD').read_text().strip()
+
+    if head.startswith('ref: '):
+        ref = head[len('ref: '):]
+        ref_file = git_dir / ref
+        if ref_file.is_file():
+            sha = ref_file.read_text().strip()
+        else:
+            # ref has been packed, lines are `<sha> <ref>`
+            sha = ''
+            for line in (git_dir / 'packed-refs').read_text().splitlines():
+                if line.endswith(f' {ref}') and not line.startswith(('#', '^')):
+                    sha = line.split(' ', 1)[0]
+                    break
+    else:
+        # detached HEAD holds the commit hash
+        sha = head
+
+    if len(sha) != 40 or any(c not in '0123456789abcdef' for c in sha):
+        raise ValueError(f"Unable to read git hash from {git_dir}")
+
+    return sha[:7]
+
+
+@functools.lru_cache(maxsize=1)
 def get_git_hash():
     """If file is being run from a git-enabled directory, this function returns the
-    hash of the active git commit and directs it to the log"""
-    base_dir = BASE_DIR = Path(__file__).resolve().parent
+    hash of the active git commit and directs it to the log.
+    The hash is looked up once per process, call `get_git_hash.cache_clear()` to look it up again."""
+    # find the .git of the enclosing repository, if any
+    git_dir = None
+    for directory in (_BASE_DIR, *_BASE_DIR.absolute().parents):
+        if (directory / '.git').exists():
+            git_dir = directory / '.git'
+            break
+    if git_dir is None:
+        # Not a git enabled directory, skip running git (and importing subprocess)
+        return ''
 
     try:
-        output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=base_dir)
-        git_hash = str(output, 'utf-8').strip()
+        return read_git_hash(git_dir)
+    except Exception:
+        # Not a plain .git directory (i.e. a worktree or submodule), let git find it
+        pass
 
-    except Exception as e:
-        # Directory is not git enabled, git is not installed, or some other error occured
+    import subprocess
+    try:
+        # fsmonitor and automatic gc can both stall git
+        git_hash = subprocess.run(
+            ['git', '-c', 'core.fsmonitor=false', '-c', 'gc.auto=0', 'rev-parse', '--short', 'HEAD'],
+            cwd=_BASE_DIR,
+            capture_output=True,
+            timeout=GIT_TIMEOUT,
+            text=True,
+            check=True).stdout.strip()
+
+    except subprocess.TimeoutExpired:
+        # git is hung (i.e. waiting on a lock), don't hold up logging
+        git_hash = ''
+
+    except Exception:
+        # git is not installed, or some other error occured
         git_hash = ''
-        print(e)
 
     return git_hash
 
+def log_format():
+    """Returns the `%`-style format of console records, including the git hash when
+    there is one."""
+    git_hash = get_git_hash()
+    git_hash_text = f'|{git_hash}|' if git_hash else '|'
+    return f'%(asctime)s|%(levelname)s|%(name)s|%(lineno)d{git_hash_text}%(message)s'
+
+
 def get_log_config(
     level='INFO',
     log_file_path='.',
-    log_file_name=LOG_NAME):
-        
-    log_file = os.path.join(log_file_path, log_file_name)
+    log_file_name=LOG_NAME,
+    log_file=None,
+    atomic_file=False):
+    """Returns the `logging.config.dictConfig` configuration for the console and log file.
+    The log file is `log_file_path/log_file_name`, or `log_file` when given (i.e. an
+    already resolved path on a network drive).
+    Records are held and written to the log file in batches, set `atomic_file` for a
+    handler that appends each record in a single write instead, for processes that log
+    to the same file at once.
+    Each call builds a new dictionary, only the git hash is cached (see `get_git_hash`)."""
+    if log_file is None:
+        log_file = str(Path(log_file_path) / log_file_name)
 
-    git_hash = get_git_hash()
-    git_hash_text = f'|{git_hash}|' if git_hash else '|'
+    # handler writing the log file
+    file_handler = 'atomic_file' if atomic_file else 'file'
+    file_handlers = {
+        'file': {
+            'level': 'INFO',
+            'formatter': 'json',
+            'class': 'logging_config.BufferedFileHandler',
+            'filename': log_file,
+            'encoding': 'utf8',
+            'mode':FILE_MODE,
+            'delay': True, # open the file on the first write
+        },
+        'atomic_file': {
+            'level': 'INFO',
+            'formatter': 'json',
+            'class': 'logging_config.AtomicAppendHandler',
+            'filename': log_file,
+            'encoding': 'utf8',
+        },
+    }
 
     log_config = {
         'version': 1,
         'disable_existing_loggers': False,
         'formatters': {
             'standard': {
-                'format': f'%(asctime)s|%(levelname)s|%(name)s|%(lineno)d{git_hash_text}%(message)s',
-                'datefmt': "%Y-%m-%d %H:%M:%S",
-            }
+                'class': 'logging_config.FastFormatter',
+                'format': log_format(),
+                'datefmt': DATE_FORMAT,
+            },
+            # one JSON object per line, for the log file
+            'json': {
+                '()': 'logging_config.OrjsonFormatter',
+                # keep JSON records whole under the atomic handler's limit
+                'max_size': ATOMIC_RECORD_SIZE - 1 if atomic_file else None,
+            },
         },
         'handlers': {
             'console': {
                 'formatter': 'standard',
                 'class': 'logging.StreamHandler',
             },
-            'file': {
-                'level': 'INFO',
-                'formatter': 'standard',
-                'class': 'logging.FileHandler',
-                'filename': log_file,
-                'encoding': 'utf8',
-                'mode':FILE_MODE,
-            }
+            file_handler: file_handlers[file_handler],
         },
         'loggers': {
             # Root logger, captures all script logs
             '': {
-                'handlers': ['console','file'],
+                'handlers': ['console', file_handler],
                 'level': level,
             },
             # Extra loggers to reduce messages coming from third-party modules
+            # (records propagate to the root handlers)
             'rasterio': {
-                'handlers': ['console','file'],
                 'level': 'WARNING',
                 },
             'pyogrio': {
-                'handlers': ['console','file'],
                 'level': 'WARNING',
                 },
             'pyproj': {
-                'handlers': ['console', 'file'],
                 'level': 'WARNING',
             },
         }
@@ -93,3 +432,76 @@ def get_log_config(
     return log_config
 
 
+def configure_logging(level='INFO', log_file=f'./{LOG_NAME}', atomic_file=False):
+    """Configures the root logger with the same console and log file handlers as
+    `logging.config.dictConfig(get_log_config(...))`, but creates the handlers directly
+    instead of going through `dictConfig`.
+    This is the faster way to set up logging in a process, `get_log_config` is kept
+    for `start_logging` and existing callers."""
+    console = logging.StreamHandler()
+    console.setFormatter(FastFormatter(log_format(), DATE_FORMAT))
+
+    if atomic_file:
+        file = AtomicAppendHandler(log_file, encoding='utf8')
+    else:
+        file = BufferedFileHandler(log_file, mode=FILE_MODE, encoding='utf8', delay=True)
+    file.setLevel(FILE_LOG_LEVEL)
+    file.setFormatter(OrjsonFormatter(max_size=ATOMIC_RECORD_SIZE - 1 if atomic_file else None))
+
+    # replace any existing root handlers, like dictConfig
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    root.addHandler(console)
+    root.addHandler(file)
+
+    # reduce messages coming from third-party modules
+    for name in ('rasterio', 'pyogrio', 'pyproj'):
+        logging.getLogger(name).setLevel('WARNING')
+
+
+def start_logging(log_config):
+    """Configures logging from `log_config` (see `get_log_config`) and moves the root
+    logger's handlers onto a `QueueListener` thread, so logging calls only put the record
+    on a queue and the console and file writes happen off the calling thread.
+    The listener is stopped, writing any queued records, at exit."""
+    global _listener
+    stop_logging()
+
+    logging.config.dictConfig(log_config)
+
+    # swap the root handlers for a queue
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(TracebackQueueHandler(_log_queue))
+
+    _listener = QueueListener(_log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Stops the listener started by `start_logging` after it writes the queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def init_worker_logging(log_config):
+    """Configures logging from `log_config` in a `multiprocessing` worker. Workers do not
+    run `atexit` handlers, so the handlers are also shut down (writing any held records)
+    by a `multiprocessing` finalizer when the worker exits.
+    To implement, pass as the pool initializer:
+    `ProcessPoolExecutor(initializer=init_worker_logging, initargs=(log_config,))`
+    """
+    import multiprocessing.util
+
+    logging.config.dictConfig(log_config)
+    multiprocessing.util.Finalize(None, logging.shutdown, exitpriority=0)